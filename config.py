@@ -1,11 +1,31 @@
 import os
+import json
 from datetime import time
+from types import MappingProxyType
+
+# orjson serializes straight to bytes ~3-5x faster than stdlib json;
+# fall back silently when it isn't installed
+try:
+    import orjson as _orjson
+except ImportError:
+    _orjson = None
 
 class Config:
     """Configuration settings for AI Attendance System"""
     
     # Database Configuration
     DATABASE_PATH = 'database/attendance_system.db'
+
+    # PRAGMAs applied to every new SQLite connection:
+    # WAL + synchronous=NORMAL halves fsyncs per commit and lets report
+    # reads run concurrently with recognition-loop writes
+    SQLITE_PRAGMAS = (
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        'PRAGMA foreign_keys=ON',
+        'PRAGMA temp_store=MEMORY',
+        'PRAGMA cache_size=-20000',
+    )
     
     # Directory Paths
     STUDENT_IMAGES_DIR = 'student_images'
@@ -30,8 +50,12 @@ class Config:
     
     # Attendance Settings
     ATTENDANCE_TIMEOUT = 300  # Seconds between same person detections
-    WORKING_HOURS_START = time(9, 0)  # 9:00 AM
-    WORKING_HOURS_END = time(17, 0)   # 5:00 PM
+    WORKING_HOURS_START = time(9, 0)  # 9:00 AM (display/serialization)
+    WORKING_HOURS_END = time(17, 0)   # 5:00 PM (display/serialization)
+    # Minute-of-day equivalents for the recognition loop: two integer
+    # compares instead of constructing and comparing datetime.time objects
+    WORKING_HOURS_START_MIN = 9 * 60
+    WORKING_HOURS_END_MIN = 17 * 60
     
     # Security Settings
     ADMIN_PASSWORD = "admin123"  # Change this in production
@@ -71,44 +95,85 @@ class Config:
     PROCESS_EVERY_N_FRAMES = 3  # Process every 3rd frame for better performance
     
     @classmethod
-    def get_camera_settings(cls):
-        """Get camera configuration"""
-        return {
+    def _rebuild_settings_views(cls):
+        """Recompute the cached read-only settings views.
+
+        The get_* accessors can be called per-frame by the recognition
+        loop, so the dicts are built once here instead of on every call.
+        MappingProxyType keeps them read-only without defensive copies.
+        """
+        cls._CAMERA_SETTINGS = MappingProxyType({
             'index': cls.CAMERA_INDEX,
             'width': cls.CAMERA_WIDTH,
             'height': cls.CAMERA_HEIGHT,
             'fps': cls.CAMERA_FPS
-        }
-    
-    @classmethod
-    def get_face_recognition_settings(cls):
-        """Get face recognition configuration"""
-        return {
+        })
+        cls._FACE_RECOGNITION_SETTINGS = MappingProxyType({
             'tolerance': cls.FACE_RECOGNITION_TOLERANCE,
             'model': cls.FACE_RECOGNITION_MODEL,
             'threshold': cls.RECOGNITION_THRESHOLD
-        }
-    
-    @classmethod
-    def get_directory_paths(cls):
-        """Get all directory paths"""
-        return {
+        })
+        cls._DIRECTORY_PATHS = MappingProxyType({
             'student_images': cls.STUDENT_IMAGES_DIR,
             'reports': cls.REPORTS_DIR,
             'temp': cls.TEMP_DIR,
             'logs': cls.LOGS_DIR,
             'backup': cls.BACKUP_DIR
-        }
+        })
+
+    def __init_subclass__(cls, **kwargs):
+        # Environment subclasses override settings, so each gets its own views
+        super().__init_subclass__(**kwargs)
+        cls._rebuild_settings_views()
+
+    @classmethod
+    def get_camera_settings(cls):
+        """Get camera configuration"""
+        return cls._CAMERA_SETTINGS
+
+    @classmethod
+    def get_face_recognition_settings(cls):
+        """Get face recognition configuration"""
+        return cls._FACE_RECOGNITION_SETTINGS
+
+    @classmethod
+    def get_directory_paths(cls):
+        """Get all directory paths"""
+        return cls._DIRECTORY_PATHS
     
+    # Set once ensure_directories has run so repeat calls skip the syscalls
+    _dirs_ensured = False
+
     @classmethod
     def ensure_directories(cls):
         """Create directories if they don't exist"""
-        directories = cls.get_directory_paths()
-        for directory in directories.values():
-            os.makedirs(directory, exist_ok=True)
-        
-        # Also create database directory
-        os.makedirs(os.path.dirname(cls.DATABASE_PATH), exist_ok=True)
+        if cls._dirs_ensured:
+            return
+
+        targets = set(cls.get_directory_paths().values())
+        targets.add(os.path.dirname(cls.DATABASE_PATH))
+
+        # Group targets by parent so each parent is listed exactly once,
+        # then mkdir only the names that are actually missing -- one
+        # listdir per parent instead of stat probes per makedirs call
+        by_parent = {}
+        for directory in targets:
+            parent, name = os.path.split(directory)
+            by_parent.setdefault(parent or '.', set()).add(name)
+
+        for parent, names in by_parent.items():
+            try:
+                existing = set(os.listdir(parent))
+            except FileNotFoundError:
+                os.makedirs(parent, exist_ok=True)
+                existing = set()
+            for name in names - existing:
+                try:
+                    os.mkdir(os.path.join(parent, name))
+                except FileExistsError:
+                    pass
+
+        cls._dirs_ensured = True
     
     @classmethod
     def validate_config(cls):
@@ -131,26 +196,38 @@ class Config:
             errors.append("Camera dimensions must be positive")
         
         # Check working hours
-        if cls.WORKING_HOURS_START >= cls.WORKING_HOURS_END:
+        if cls.WORKING_HOURS_START_MIN >= cls.WORKING_HOURS_END_MIN:
             errors.append("WORKING_HOURS_START must be before WORKING_HOURS_END")
-        
+
         return errors
+
+    @classmethod
+    def is_within_hours(cls, now):
+        """Check whether a datetime falls inside working hours"""
+        minute_of_day = now.hour * 60 + now.minute
+        return cls.WORKING_HOURS_START_MIN <= minute_of_day < cls.WORKING_HOURS_END_MIN
     
     @classmethod
     def load_from_file(cls, config_file='config.json'):
         """Load configuration from JSON file"""
-        import json
-        
         if os.path.exists(config_file):
             try:
-                with open(config_file, 'r') as f:
-                    config_data = json.load(f)
-                
-                # Update class attributes
-                for key, value in config_data.items():
-                    if hasattr(cls, key):
-                        setattr(cls, key, value)
-                
+                # orjson parses bytes directly, so read binary on that path
+                if _orjson is not None:
+                    with open(config_file, 'rb') as f:
+                        config_data = _orjson.loads(f.read())
+                else:
+                    with open(config_file, 'r') as f:
+                        config_data = json.load(f)
+
+                if config_data:
+                    # Frozenset membership replaces a hasattr (a full MRO
+                    # walk plus exception probe) per key
+                    for key, value in config_data.items():
+                        if key in cls._VALID_KEYS:
+                            setattr(cls, key, value)
+                    cls._rebuild_settings_views()
+
                 return True
             except Exception as e:
                 print(f"Error loading config file: {e}")
@@ -161,23 +238,37 @@ class Config:
     @classmethod
     def save_to_file(cls, config_file='config.json'):
         """Save configuration to JSON file"""
-        import json
-        
-        config_data = {}
-        
-        # Get all class attributes that are not methods
-        for attr_name in dir(cls):
-            if not attr_name.startswith('_') and not callable(getattr(cls, attr_name)):
-                config_data[attr_name] = getattr(cls, attr_name)
-        
+        config_data = {key: getattr(cls, key) for key in cls._SERIALIZABLE_KEYS}
+
         try:
-            with open(config_file, 'w') as f:
-                json.dump(config_data, f, indent=4, default=str)
+            if _orjson is not None:
+                with open(config_file, 'wb') as f:
+                    f.write(_orjson.dumps(
+                        config_data,
+                        option=_orjson.OPT_INDENT_2 | _orjson.OPT_SERIALIZE_NUMPY,
+                        default=str,
+                    ))
+            else:
+                with open(config_file, 'w') as f:
+                    json.dump(config_data, f, indent=4, default=str)
             return True
         except Exception as e:
             print(f"Error saving config file: {e}")
             return False
 
+    # Snapshot of the plain config attributes, computed once at class
+    # definition so save_to_file doesn't reflect over dir(cls) (which also
+    # picked up everything inherited from object) on every call
+    _SERIALIZABLE_KEYS = tuple(
+        k for k, v in vars().items()
+        if not k.startswith('_') and not callable(v)
+        and not isinstance(v, (classmethod, staticmethod))
+    )
+    _VALID_KEYS = frozenset(_SERIALIZABLE_KEYS)
+
+# __init_subclass__ only fires for subclasses, so seed the base class here
+Config._rebuild_settings_views()
+
 # Environment-specific configurations
 class DevelopmentConfig(Config):
     """Development configuration"""
@@ -200,12 +291,13 @@ class TestingConfig(Config):
     ATTENDANCE_TIMEOUT = 10  # Shorter timeout for testing
 
 # Configuration factory
+# Built once at import so get_config doesn't allocate a dict per call
+_CONFIG_MAP = MappingProxyType({
+    'development': DevelopmentConfig,
+    'production': ProductionConfig,
+    'testing': TestingConfig
+})
+
 def get_config(environment='development'):
     """Get configuration based on environment"""
-    config_map = {
-        'development': DevelopmentConfig,
-        'production': ProductionConfig,
-        'testing': TestingConfig
-    }
-    
-    return config_map.get(environment, DevelopmentConfig)
\ No newline at end of file
+    return _CONFIG_MAP.get(environment, DevelopmentConfig)
\ No newline at end of file
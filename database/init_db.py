@@ -9,26 +9,28 @@ import os
 import sys
 from datetime import datetime, date
 
+import numpy as np
+
 # Add parent directory to path to import config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import Config
 
-def create_database():
-    """Create database and tables"""
-    
-    # Ensure database directory exists
-    db_dir = os.path.dirname(Config.DATABASE_PATH)
-    if not os.path.exists(db_dir):
-        os.makedirs(db_dir)
-    
-    # Connect to database
-    conn = sqlite3.connect(Config.DATABASE_PATH)
-    cursor = conn.cursor()
-    
-    print("Creating database tables...")
-    
-    # Create students table
-    cursor.execute('''
+# Register explicit adapters once at import so values cross the Python/
+# SQLite boundary through a direct function instead of per-row protocol
+# probing: numpy arrays go in as raw float32 buffers and dates as
+# proleptic ordinals, matching the storage contracts in SCHEMA_SQL below.
+# Connections opened with detect_types=sqlite3.PARSE_DECLTYPES get the
+# FLOAT_VEC converter applied to the encoding column automatically.
+sqlite3.register_adapter(np.ndarray, lambda a: sqlite3.Binary(a.astype(np.float32, copy=False).tobytes()))
+sqlite3.register_adapter(date, date.toordinal)
+sqlite3.register_converter('FLOAT_VEC', lambda b: np.frombuffer(b, dtype=np.float32))
+
+# The whole schema as one script, parsed once at import: run through
+# executescript it executes as a single transaction (one commit/fsync
+# instead of one per statement)
+SCHEMA_SQL = '''
+        BEGIN;
+
         CREATE TABLE IF NOT EXISTS students (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT NOT NULL,
@@ -39,44 +41,63 @@ def create_database():
             year INTEGER,
             section TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Create attendance table
-    cursor.execute('''
+            updated_at TIMESTAMP
+        );
+
         CREATE TABLE IF NOT EXISTS attendance (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             student_id INTEGER NOT NULL,
-            date DATE NOT NULL,
-            time_in TIME,
-            time_out TIME,
+            -- Dates are stored as proleptic ordinals (date.toordinal())
+            -- and times as seconds since midnight: fixed-width 8-byte
+            -- index keys compare with a single integer compare instead of
+            -- a strcmp, and range scans pack the B-tree tighter. Use
+            -- attendance_v below for the human-readable form.
+            date INTEGER NOT NULL,
+            time_in INTEGER,
+            time_out INTEGER,
             status TEXT DEFAULT 'Present',
             remarks TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP,
             FOREIGN KEY (student_id) REFERENCES students (id) ON DELETE CASCADE,
+            -- One row per student per day. Writers must insert with
+            -- ON CONFLICT(student_id, date) DO NOTHING so repeat
+            -- detections report 0 rows changed instead of raising
+            -- IntegrityError on every re-sighting
             UNIQUE(student_id, date)
-        )
-    ''')
-    
-    # Create face_encodings table
-    cursor.execute('''
+        );
+
+        -- Human-readable projection of attendance for legacy report code
+        -- (ordinal 719163 == 1970-01-01, the unix epoch)
+        CREATE VIEW IF NOT EXISTS attendance_v AS
+            SELECT id,
+                   student_id,
+                   date((date - 719163) * 86400, 'unixepoch') AS date,
+                   time(time_in, 'unixepoch') AS time_in,
+                   time(time_out, 'unixepoch') AS time_out,
+                   status,
+                   remarks,
+                   created_at,
+                   updated_at
+            FROM attendance;
+
         CREATE TABLE IF NOT EXISTS face_encodings (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             student_id INTEGER NOT NULL,
-            encoding BLOB NOT NULL,
+            -- Raw 128 x float32 buffer (512 bytes), no pickling. The
+            -- registered np.ndarray adapter writes this form; readers on
+            -- PARSE_DECLTYPES connections get arrays back via the
+            -- FLOAT_VEC converter, others use np.frombuffer(blob,
+            -- dtype=np.float32)
+            encoding FLOAT_VEC NOT NULL CHECK(length(encoding) = 512),
             image_path TEXT,
             confidence REAL DEFAULT 0.0,
             is_active BOOLEAN DEFAULT 1,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP,
             FOREIGN KEY (student_id) REFERENCES students (id) ON DELETE CASCADE
-        )
-    ''')
-    
-    # Create attendance_logs table for detailed logging
-    cursor.execute('''
+        );
+
         CREATE TABLE IF NOT EXISTS attendance_logs (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             student_id INTEGER,
@@ -87,23 +108,17 @@ def create_database():
             image_path TEXT,
             remarks TEXT,
             FOREIGN KEY (student_id) REFERENCES students (id) ON DELETE SET NULL
-        )
-    ''')
-    
-    # Create system_settings table
-    cursor.execute('''
+        );
+
         CREATE TABLE IF NOT EXISTS system_settings (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             setting_key TEXT UNIQUE NOT NULL,
             setting_value TEXT,
             description TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Create admin_users table
-    cursor.execute('''
+            updated_at TIMESTAMP
+        );
+
         CREATE TABLE IF NOT EXISTS admin_users (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             username TEXT UNIQUE NOT NULL,
@@ -113,31 +128,94 @@ def create_database():
             is_active BOOLEAN DEFAULT 1,
             last_login TIMESTAMP,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Create indexes for better performance
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_attendance_date ON attendance(date)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_attendance_student ON attendance(student_id)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_logs_student ON attendance_logs(student_id)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_face_student ON face_encodings(student_id)')
-    
-    # Commit and close
-    conn.commit()
-    conn.close()
+            updated_at TIMESTAMP
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_attendance_date ON attendance(date);
+        -- Composite indexes matching the hot query shapes:
+        -- duplicate detection filters on (student_id, date), reports scan
+        -- (date, student_id); single-column indexes would need an extra
+        -- table lookup per row
+        DROP INDEX IF EXISTS idx_attendance_student;
+        CREATE INDEX IF NOT EXISTS idx_attendance_student_date ON attendance(student_id, date);
+        CREATE INDEX IF NOT EXISTS idx_attendance_date_student ON attendance(date, student_id);
+        CREATE INDEX IF NOT EXISTS idx_logs_student ON attendance_logs(student_id);
+        CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON attendance_logs(timestamp);
+        CREATE INDEX IF NOT EXISTS idx_face_student ON face_encodings(student_id);
+        -- Partial covering index for the recognition preload
+        -- (SELECT student_id, encoding ... WHERE is_active=1): both filter
+        -- columns live in the index and only active rows are indexed, so
+        -- the scan touches the table heap just to pull the BLOB -- which
+        -- sits early in the row, keeping the record walk short
+        DROP INDEX IF EXISTS idx_face_active;
+        CREATE INDEX IF NOT EXISTS idx_face_active_cover ON face_encodings(is_active, student_id) WHERE is_active=1;
+
+        -- updated_at is maintained by these triggers on explicit UPDATEs
+        -- only; defaulting it on INSERT made SQLite fetch the current time
+        -- twice per inserted row. attendance_logs rows are immutable and
+        -- carry no updated_at at all.
+        CREATE TRIGGER IF NOT EXISTS trg_students_upd AFTER UPDATE ON students
+            BEGIN UPDATE students SET updated_at=CURRENT_TIMESTAMP WHERE id=NEW.id; END;
+        CREATE TRIGGER IF NOT EXISTS trg_attendance_upd AFTER UPDATE ON attendance
+            BEGIN UPDATE attendance SET updated_at=CURRENT_TIMESTAMP WHERE id=NEW.id; END;
+        CREATE TRIGGER IF NOT EXISTS trg_face_encodings_upd AFTER UPDATE ON face_encodings
+            BEGIN UPDATE face_encodings SET updated_at=CURRENT_TIMESTAMP WHERE id=NEW.id; END;
+        CREATE TRIGGER IF NOT EXISTS trg_system_settings_upd AFTER UPDATE ON system_settings
+            BEGIN UPDATE system_settings SET updated_at=CURRENT_TIMESTAMP WHERE id=NEW.id; END;
+        CREATE TRIGGER IF NOT EXISTS trg_admin_users_upd AFTER UPDATE ON admin_users
+            BEGIN UPDATE admin_users SET updated_at=CURRENT_TIMESTAMP WHERE id=NEW.id; END;
+
+        COMMIT;
+'''
+
+def create_database():
+    """Create database and tables"""
+
+    # Ensure database directory exists
+    db_dir = os.path.dirname(Config.DATABASE_PATH)
+    if not os.path.exists(db_dir):
+        os.makedirs(db_dir)
+
+    # Connect to database and apply the shared connection PRAGMAs
+    # (WAL mode persists in the database header, so this is one-time setup)
+    conn = sqlite3.connect(Config.DATABASE_PATH, detect_types=sqlite3.PARSE_DECLTYPES)
+    for pragma in Config.SQLITE_PRAGMAS:
+        conn.execute(pragma)
+
+    print("Creating database tables...")
+
+    # The connection context manager rolls back on error, so a CREATE
+    # failing mid-script can't leave a half-initialized database; on
+    # success the script's own COMMIT has already landed and no separate
+    # conn.commit() is needed
+    with conn:
+        conn.executescript(SCHEMA_SQL)
+
+    # Seed sqlite_stat1 so the planner picks indexes from real statistics
+    # instead of heuristics; PRAGMA optimize keeps them fresh cheaply on
+    # later connections (long-lived deployments should also run ANALYZE
+    # periodically, e.g. alongside the backup schedule)
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA optimize")
+
     print("Database initialized successfully.")
 
-if __name__ == "__main__":
-    create_database()
+    # Hand the open connection back so callers don't pay for a reconnect
+    return conn
 
-conn = sqlite3.connect('attendance_system.db')
-cursor = conn.cursor()
+if __name__ == "__main__":
+    conn = create_database()
 
-print('face_encodings table:')
-cursor.execute('SELECT id, student_id, image_path, created_at FROM face_encodings')
-rows = cursor.fetchall()
-for row in rows:
-    print(row)
+    # Verification: reuse the connection from create_database and pull
+    # rows in fetchmany batches instead of materializing fetchall();
+    # sqlite3.Row lets downstream code index columns by name
+    conn.row_factory = sqlite3.Row
+    print('face_encodings table:')
+    # Keep the encoding BLOB out of this SELECT -- it isn't printed, and
+    # including it would drag every 512-byte encoding into memory
+    cursor = conn.execute('SELECT id, student_id, image_path, created_at FROM face_encodings')
+    for batch in iter(lambda: cursor.fetchmany(256), []):
+        for row in batch:
+            print(tuple(row))
 
-conn.close()
+    conn.close()
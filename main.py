@@ -8,8 +8,12 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from PIL import Image, ImageTk
 import threading
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+import pyarrow as pa
+import pyarrow.parquet as pq
+import xlsxwriter
 from config import Config
+from reports.xlsx_stream_writer import XlsxStreamWriter
 import logging
 import shutil
 import json
@@ -36,10 +40,20 @@ class AttendanceSystem:
         
         # Threading lock for DB
         self.db_lock = threading.Lock()
-        
+
+        # Single worker for blocking file I/O (exports, backup/restore) so
+        # those operations can't freeze the Tk event loop; one worker
+        # keeps them serialized against each other
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='io')
+
+
+        # Source records behind the report view, cached so exports don't
+        # have to read rows back out of the Treeview
+        self._last_report = None
+
         # Load known faces
         self.load_known_faces()
-        
+
         # Setup GUI
         self.setup_gui()
         
@@ -73,6 +87,15 @@ class AttendanceSystem:
         """Initialize SQLite database"""
         os.makedirs('database', exist_ok=True)
         self.conn = sqlite3.connect('database/attendance_system.db', check_same_thread=False)
+        # Shared PRAGMAs (WAL journal etc.) let report reads run while the
+        # recognition loop writes; the mmap window and enlarged page cache
+        # keep repeated report aggregations reading from memory. The
+        # student report itself aggregates server-side in one CTE query,
+        # so these reads are its only I/O.
+        for pragma in Config.SQLITE_PRAGMAS:
+            self.conn.execute(pragma)
+        self.conn.execute('PRAGMA mmap_size=268435456')
+        self.conn.execute('PRAGMA cache_size=-65536')
         self.cursor = self.conn.cursor()
         
         # Create tables
@@ -91,15 +114,25 @@ class AttendanceSystem:
             CREATE TABLE IF NOT EXISTS attendance (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 student_id INTEGER,
-                date DATE,
-                time_in TIME,
-                time_out TIME,
+                -- Integer storage contract shared with database/init_db.py:
+                -- date is a proleptic ordinal (date.toordinal()), times are
+                -- seconds since midnight. Queries convert back for display.
+                date INTEGER,
+                time_in INTEGER,
+                time_out INTEGER,
                 status TEXT DEFAULT 'Present',
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 FOREIGN KEY (student_id) REFERENCES students (id)
             )
         ''')
-        
+
+        # One attendance row per student per day; pairs with the
+        # ON CONFLICT DO NOTHING insert in mark_attendance
+        self.cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_attendance_student_date
+            ON attendance (student_id, date)
+        ''')
+
         self.cursor.execute('''
             CREATE TABLE IF NOT EXISTS face_encodings (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -119,17 +152,25 @@ class AttendanceSystem:
             self.cursor.execute("SELECT fe.encoding, s.name, s.id FROM face_encodings fe JOIN students s ON fe.student_id = s.id")
             results = self.cursor.fetchall()
         
-        self.known_face_encodings = []
+        encodings = []
         self.known_face_names = []
         self.known_face_ids = []
-        
+
         for encoding_blob, name, student_id in results:
-            encoding = np.frombuffer(encoding_blob, dtype=np.float64)
-            encoding = encoding.reshape((128,))  # Ensure correct shape
-            self.known_face_encodings.append(encoding)
+            # Storage contract is a raw 128 x float32 buffer (512 bytes);
+            # rows written before the format change may still be float64
+            if len(encoding_blob) == 512:
+                encoding = np.frombuffer(encoding_blob, dtype=np.float32)
+            else:
+                encoding = np.frombuffer(encoding_blob, dtype=np.float64)
+            encodings.append(encoding.reshape((128,)))
             self.known_face_names.append(name)
             self.known_face_ids.append(student_id)
-        
+
+        # One contiguous (N, 128) float32 matrix so the per-frame distance
+        # computation is a single vectorized operation
+        self.known_face_encodings = np.asarray(encodings, dtype=np.float32).reshape(-1, 128)
+
         self.logger.info(f"Loaded {len(self.known_face_encodings)} known faces")
         
     def setup_gui(self):
@@ -301,8 +342,15 @@ class AttendanceSystem:
         self.student_report_btn = ttk.Button(self.report_buttons, text="Student Report", command=self.generate_student_report)
         self.student_report_btn.pack(side='left', padx=5)
         
-        self.export_excel_btn = ttk.Button(self.report_buttons, text="Export to Excel", command=self.export_to_excel)
-        self.export_excel_btn.pack(side='left', padx=5)
+        # Parquet is the fast columnar default for programmatic consumers;
+        # xlsx stays available as the presentation format
+        self.export_format = tk.StringVar(value='parquet')
+        self.format_combo = ttk.Combobox(self.report_buttons, textvariable=self.export_format,
+                                         values=('parquet', 'xlsx'), width=8, state='readonly')
+        self.format_combo.pack(side='left', padx=5)
+
+        self.export_btn = ttk.Button(self.report_buttons, text="Export Report", command=self.export_report)
+        self.export_btn.pack(side='left', padx=5)
         
         # Report display
         self.report_display = ttk.LabelFrame(self.reports_frame, text="Report Data")
@@ -427,9 +475,12 @@ class AttendanceSystem:
                 
     def mark_attendance(self, student_id, name):
         """Mark attendance for a student"""
-        today = date.today().isoformat()
-        current_time = datetime.now().strftime('%H:%M:%S')
-        
+        # Store the integer forms the schema declares: ordinal date and
+        # seconds since midnight
+        today = date.today().toordinal()
+        now = datetime.now()
+        current_time = now.hour * 3600 + now.minute * 60 + now.second
+
         # Check if already marked today
         with self.db_lock:
             self.cursor.execute("SELECT * FROM attendance WHERE student_id = ? AND date = ?", (student_id, today))
@@ -437,13 +488,20 @@ class AttendanceSystem:
         
         if not existing:
             with self.db_lock:
+                # DO NOTHING makes a racing duplicate detection report 0
+                # rows changed instead of raising IntegrityError
                 self.cursor.execute("""
                     INSERT INTO attendance (student_id, date, time_in, status)
                     VALUES (?, ?, ?, 'Present')
+                    ON CONFLICT(student_id, date) DO NOTHING
                 """, (student_id, today, current_time))
+                inserted = self.cursor.rowcount > 0
                 self.conn.commit()
-            self.logger.info(f"Attendance marked for {name} at {current_time}")
-            self.refresh_attendance()
+            if inserted:
+                self.logger.info(f"Attendance marked for {name} at {now.strftime('%H:%M:%S')}")
+                self.refresh_attendance()
+            else:
+                self.logger.info(f"Attendance already marked for {name} today")
         else:
             self.logger.info(f"Attendance already marked for {name} today")
             
@@ -492,8 +550,8 @@ class AttendanceSystem:
                 image_path = os.path.join('student_images', image_filename)
                 shutil.copy2(self.selected_image_path, image_path)
                 
-                # Save face encoding
-                encoding_blob = face_encodings[0].tobytes()
+                # Save face encoding as a raw 128 x float32 buffer (512 bytes)
+                encoding_blob = sqlite3.Binary(face_encodings[0].astype(np.float32).tobytes())
                 with self.db_lock:
                     self.cursor.execute("""
                         INSERT INTO face_encodings (student_id, encoding, image_path)
@@ -613,10 +671,11 @@ class AttendanceSystem:
         """Refresh today's attendance"""
         for item in self.attendance_tree.get_children():
             self.attendance_tree.delete(item)
-        today = date.today()
+        today = date.today().toordinal()
         with self.db_lock:
             self.cursor.execute("""
-                SELECT s.name, s.roll_number, a.time_in, a.status
+                SELECT s.name, s.roll_number,
+                       time(a.time_in, 'unixepoch') AS time_in, a.status
                 FROM attendance a
                 JOIN students s ON a.student_id = s.id
                 WHERE a.date = ?
@@ -626,10 +685,27 @@ class AttendanceSystem:
         for record in attendance_records:
             self.attendance_tree.insert('', 'end', values=record)
             
+    def _report_date_range(self):
+        """Read the report date entries as the stored ordinal form.
+
+        Returns (from_ord, to_ord), or None (after telling the user) when
+        an entry isn't a valid YYYY-MM-DD date.
+        """
+        try:
+            return (date.fromisoformat(self.from_date_entry.get()).toordinal(),
+                    date.fromisoformat(self.to_date_entry.get()).toordinal())
+        except ValueError:
+            messagebox.showerror("Error", "Dates must be in YYYY-MM-DD format!")
+            return None
+
     def generate_daily_report(self):
         """Generate daily attendance report"""
         from_date = self.from_date_entry.get()
         to_date = self.to_date_entry.get()
+        date_range = self._report_date_range()
+        if date_range is None:
+            return
+        from_ord, to_ord = date_range
         # Clear previous report
         for item in self.report_tree.get_children():
             self.report_tree.delete(item)
@@ -637,24 +713,36 @@ class AttendanceSystem:
         self.report_tree['columns'] = ('Date', 'Name', 'Roll', 'Time In', 'Status')
         for col in self.report_tree['columns']:
             self.report_tree.heading(col, text=col)
-        # Get data
+        # Get data; filter and sort on the raw integers, convert to the
+        # human-readable forms only in the projection
+        # (ordinal 719163 == 1970-01-01, the unix epoch)
         with self.db_lock:
             self.cursor.execute("""
-                SELECT a.date, s.name, s.roll_number, a.time_in, a.status
+                SELECT date((a.date - 719163) * 86400, 'unixepoch') AS date,
+                       s.name, s.roll_number,
+                       time(a.time_in, 'unixepoch') AS time_in, a.status
                 FROM attendance a
                 JOIN students s ON a.student_id = s.id
                 WHERE a.date BETWEEN ? AND ?
                 ORDER BY a.date, a.time_in
-            """, (from_date, to_date))
+            """, (from_ord, to_ord))
             records = self.cursor.fetchall()
+        self._last_report = {'columns': list(self.report_tree['columns']), 'rows': records}
+        # Hoist the bound method so the loop skips two attribute lookups
+        # per row and is pure Tcl dispatch
+        insert = self.report_tree.insert
         for record in records:
-            self.report_tree.insert('', 'end', values=record)
+            insert('', 'end', values=record)
         self.logger.info(f"Generated daily report from {from_date} to {to_date}")
         
     def generate_student_report(self):
         """Generate student-wise attendance report"""
         from_date = self.from_date_entry.get()
         to_date = self.to_date_entry.get()
+        date_range = self._report_date_range()
+        if date_range is None:
+            return
+        from_ord, to_ord = date_range
         # Clear previous report
         for item in self.report_tree.get_children():
             self.report_tree.delete(item)
@@ -662,63 +750,184 @@ class AttendanceSystem:
         self.report_tree['columns'] = ('Name', 'Roll', 'Total Days', 'Present Days', 'Attendance %')
         for col in self.report_tree['columns']:
             self.report_tree.heading(col, text=col)
-        # Get data
+        # Get data with the percentage already computed and formatted by
+        # SQLite, so each fetched row inserts straight into the Treeview
         with self.db_lock:
             self.cursor.execute("""
-                SELECT s.name, s.roll_number, 
-                       COUNT(DISTINCT a.date) as present_days,
-                       (SELECT COUNT(DISTINCT date) FROM attendance WHERE date BETWEEN ? AND ?) as total_days
+                WITH totals AS (
+                    SELECT COUNT(DISTINCT date) AS total_days
+                    FROM attendance WHERE date BETWEEN ? AND ?
+                )
+                SELECT s.name, s.roll_number, t.total_days,
+                       COUNT(DISTINCT a.date) AS present_days,
+                       CASE WHEN t.total_days > 0
+                            THEN printf('%.1f%%', COUNT(DISTINCT a.date) * 100.0 / t.total_days)
+                            ELSE '0.0%' END AS pct
                 FROM students s
+                CROSS JOIN totals t
                 LEFT JOIN attendance a ON s.id = a.student_id AND a.date BETWEEN ? AND ?
-                GROUP BY s.id, s.name, s.roll_number
+                GROUP BY s.id, s.name, s.roll_number, t.total_days
                 ORDER BY s.name
-            """, (from_date, to_date, from_date, to_date))
+            """, (from_ord, to_ord, from_ord, to_ord))
             records = self.cursor.fetchall()
+        self._last_report = {'columns': list(self.report_tree['columns']), 'rows': records}
+        insert = self.report_tree.insert
         for record in records:
-            name, roll, present_days, total_days = record
-            if total_days > 0:
-                percentage = (present_days / total_days) * 100
-            else:
-                percentage = 0
-            self.report_tree.insert('', 'end', values=(name, roll, total_days, present_days, f"{percentage:.1f}%"))
+            insert('', 'end', values=record)
         self.logger.info(f"Generated student report from {from_date} to {to_date}")
         
-    def export_to_excel(self):
-        """Export current report to Excel"""
-        try:
-            # Get data from current report
-            data = []
-            columns = []
-            if self.report_tree['columns']:
-                columns = list(self.report_tree['columns'])
-                for item in self.report_tree.get_children():
-                    values = self.report_tree.item(item)['values']
-                    data.append(values)
-            if data:
-                df = pd.DataFrame(data, columns=columns)
-                # Save to Excel
-                filename = f"attendance_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    def _run_in_background(self, task, on_done):
+        """Run blocking file I/O off the Tk main loop.
+
+        task runs on the worker thread; its return value (or the exception
+        it raised) is handed to on_done back on the main loop via after(),
+        so the UI stays responsive and all widget access stays on the main
+        thread.
+        """
+        def worker():
+            try:
+                result = task()
+            except Exception as e:
+                result = e
+            self.root.after(0, lambda: on_done(result))
+        self.executor.submit(worker)
+
+    def export_report(self):
+        """Export the current report in the selected format"""
+        if self.export_format.get() == 'parquet':
+            self.export_to_parquet()
+        else:
+            self.export_to_excel()
+
+    def _collect_report_rows(self):
+        """Get the current report's columns and row tuples.
+
+        Prefers the records cached by the report builders -- reading rows
+        back out of the Treeview costs a Tcl round-trip per row -- and
+        falls back to walking the widget only when no cache exists.
+        """
+        if self._last_report is not None:
+            return self._last_report['columns'], self._last_report['rows']
+        columns = list(self.report_tree['columns'] or ())
+        data = [self.report_tree.item(item)['values'] for item in self.report_tree.get_children()]
+        return columns, data
+
+    def export_to_parquet(self):
+        """Export current report to Parquet"""
+        columns, data = self._collect_report_rows()
+        if not data:
+            messagebox.showwarning("No Data", "There is no report data to export.")
+            self.logger.warning("Export attempt with no data in report view")
+            return
+        filename = f"attendance_report_{time.strftime('%Y%m%d_%H%M%S')}.parquet"
+        filepath = os.path.join('reports', filename)
+
+        def task():
+            # Build the Arrow table straight from the row tuples -- going
+            # through a DataFrame first would copy the data twice (ndarray
+            # inference, then the block manager) just to hand it to arrow
+            # anyway. zstd-compressed parquet is several times smaller
+            # than xlsx/csv and reads back directly into analytics tools
+            table = pa.table(
+                {name: list(values) for name, values in zip(columns, zip(*data))})
+            pq.write_table(table, filepath, compression='zstd')
+            return filepath
+
+        def done(result):
+            if isinstance(result, Exception):
+                messagebox.showerror("Export Error", f"Failed to export report: {str(result)}")
+                self.logger.error(f"Export failed: {str(result)}")
+            else:
+                messagebox.showinfo("Success", f"Report exported to {result}")
+                self.logger.info(f"Report exported to {result}")
+
+        self._run_in_background(task, done)
+
+    def export_to_excel(self, segment_size=250000):
+        """Export current report to Excel, segmenting very large reports"""
+        # Get data from current report (Treeview access must stay on the
+        # main thread; the file writing below runs on the worker)
+        columns, data = self._collect_report_rows()
+        if not data:
+            messagebox.showwarning("No Data", "There is no report data to export.")
+            self.logger.warning("Export attempt with no data in report view")
+            return
+        ts = time.strftime('%Y%m%d_%H%M%S')
+        # Segment huge exports into numbered part files: each stays
+        # well under Excel's 1,048,576-row sheet limit and write
+        # time per workbook stays flat
+        segmented = len(data) > segment_size
+        # Beyond ~100k rows even constant_memory xlsxwriter spends
+        # its time formatting cells in Python, so switch to the raw
+        # XML stream writer (unstyled) for enormous exports
+        use_raw_xml = len(data) > 100000
+
+        def task():
+            written = []
+            for part, start in enumerate(range(0, len(data), segment_size), start=1):
+                if segmented:
+                    filename = f"attendance_report_{ts}_part{part}.xlsx"
+                else:
+                    filename = f"attendance_report_{ts}.xlsx"
                 filepath = os.path.join('reports', filename)
-                df.to_excel(filepath, index=False)
-                messagebox.showinfo("Success", f"Report exported to {filepath}")
-                self.logger.info(f"Report exported to {filepath}")
+                if use_raw_xml:
+                    XlsxStreamWriter(filepath).write(columns, data[start:start + segment_size])
+                    written.append(filepath)
+                    continue
+                # constant_memory streams each row straight to disk
+                # instead of building the whole sheet (plus pandas'
+                # per-cell styler machinery) in memory
+                workbook = xlsxwriter.Workbook(filepath, {'constant_memory': True, 'strings_to_numbers': False})
+                worksheet = workbook.add_worksheet()
+                # One shared format object carries all header styling;
+                # creating formats per cell defeats xlsxwriter's
+                # format cache
+                header_format = workbook.add_format(
+                    {'bold': True, 'bottom': 1, 'align': 'center'})
+                worksheet.write_row(0, 0, columns, header_format)
+                for row_num, values in enumerate(data[start:start + segment_size], start=1):
+                    worksheet.write_row(row_num, 0, values)
+                workbook.close()
+                written.append(filepath)
+            return written
+
+        def done(result):
+            if isinstance(result, Exception):
+                messagebox.showerror("Export Error", f"Failed to export report: {str(result)}")
+                self.logger.error(f"Export failed: {str(result)}")
             else:
-                messagebox.showwarning("No Data", "There is no report data to export.")
-                self.logger.warning("Export attempt with no data in report view")
-        except Exception as e:
-            messagebox.showerror("Export Error", f"Failed to export report: {str(e)}")
-            self.logger.error(f"Export failed: {str(e)}")
+                target = result[0] if not segmented else f"{len(result)} part files in reports/"
+                messagebox.showinfo("Success", f"Report exported to {target}")
+                self.logger.info(f"Report exported to {', '.join(result)}")
+
+        self._run_in_background(task, done)
 
     def backup_database(self):
         """Backup the database to the backup folder"""
-        try:
-            backup_path = os.path.join('backup', f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db")
-            shutil.copy2('database/attendance_system.db', backup_path)
-            messagebox.showinfo("Success", f"Database backed up to {backup_path}")
-            self.logger.info(f"Database backup created at {backup_path}")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to backup database: {str(e)}")
-            self.logger.error(f"Database backup failed: {str(e)}")
+        backup_path = os.path.join('backup', f"backup_{time.strftime('%Y%m%d_%H%M%S')}.db")
+
+        def task():
+            # The online backup API copies pages consistently while the
+            # live connection keeps writing -- a raw file copy could catch
+            # the database mid-write; pages=1024 batches the copy so the
+            # GIL is released between steps. Safe off-thread: the
+            # connection is opened with check_same_thread=False and all
+            # access goes through db_lock.
+            dst = sqlite3.connect(backup_path)
+            with self.db_lock:
+                self.conn.backup(dst, pages=1024)
+            dst.close()
+            return backup_path
+
+        def done(result):
+            if isinstance(result, Exception):
+                messagebox.showerror("Error", f"Failed to backup database: {str(result)}")
+                self.logger.error(f"Database backup failed: {str(result)}")
+            else:
+                messagebox.showinfo("Success", f"Database backed up to {result}")
+                self.logger.info(f"Database backup created at {result}")
+
+        self._run_in_background(task, done)
 
     def restore_database(self):
         """Restore the database from a selected backup file"""
@@ -726,30 +935,61 @@ class AttendanceSystem:
             title="Select Backup File",
             filetypes=[("Database files", "*.db")]
         )
-        if file_path:
-            try:
-                shutil.copy2(file_path, 'database/attendance_system.db')
-                self.conn.close()
-                self.setup_database()
+        if not file_path:
+            return
+
+        def task():
+            # Pull the backup's rows in with ATTACH + INSERT ... SELECT:
+            # the copy runs entirely inside SQLite in one transaction, and
+            # self.conn -- with its prepared-statement cache and
+            # row_factory -- stays valid throughout, so no reconnect
+            with self.db_lock:
+                self.conn.execute("ATTACH DATABASE ? AS src", (file_path,))
+                try:
+                    self.conn.execute("BEGIN")
+                    # Children first on delete, parents first on insert, so
+                    # foreign keys hold at every step
+                    for table in ('face_encodings', 'attendance', 'students'):
+                        self.conn.execute(f"DELETE FROM main.{table}")
+                    for table in ('students', 'attendance', 'face_encodings'):
+                        self.conn.execute(f"INSERT INTO main.{table} SELECT * FROM src.{table}")
+                    self.conn.execute("COMMIT")
+                except Exception:
+                    self.conn.execute("ROLLBACK")
+                    raise
+                finally:
+                    self.conn.execute("DETACH DATABASE src")
+
+        def done(result):
+            if isinstance(result, Exception):
+                messagebox.showerror("Error", f"Failed to restore database: {str(result)}")
+                self.logger.error(f"Database restore failed: {str(result)}")
+            else:
+                # Widget refreshes run here on the main loop, after the
+                # copy has finished
                 self.load_known_faces()
                 self.refresh_students()
                 self.refresh_attendance()
                 messagebox.showinfo("Success", "Database restored successfully!")
                 self.logger.info(f"Database restored from {file_path}")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to restore database: {str(e)}")
-                self.logger.error(f"Database restore failed: {str(e)}")
+
+        self._run_in_background(task, done)
 
     def load_system_info(self):
         """Load and display system info in the settings tab"""
-        info = {
-            "System": "AI-Powered Attendance System",
-            "Version": "1.0.0",
-            "Database Path": os.path.abspath('database/attendance_system.db'),
-            "Reports Directory": os.path.abspath('reports'),
-            "Images Directory": os.path.abspath('student_images'),
-            "Created": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
+        if not hasattr(self, '_system_info_cache'):
+            # The static fields (including the abspath syscalls) never
+            # change while the app runs, so compute them once; only the
+            # Created stamp stays dynamic
+            self._system_info_cache = {
+                "System": "AI-Powered Attendance System",
+                "Version": "1.0.0",
+                "Database Path": os.path.abspath('database/attendance_system.db'),
+                "Reports Directory": os.path.abspath('reports'),
+                "Images Directory": os.path.abspath('student_images'),
+            }
+        info = {**self._system_info_cache,
+                "Created": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
         self.info_text.delete('1.0', tk.END)
         self.info_text.insert(tk.END, json.dumps(info, indent=4))
         self.logger.info("System info loaded")
@@ -757,6 +997,14 @@ class AttendanceSystem:
     def run(self):
         """Run the main application loop"""
         self.root.mainloop()
+        # Let any in-flight export/backup finish before closing the
+        # connection out from under it
+        self.executor.shutdown(wait=True)
+        # Refresh query-planner statistics on shutdown so they keep up
+        # with table growth across sessions
+        with self.db_lock:
+            self.conn.execute("PRAGMA optimize")
+            self.conn.close()
 
 
 if __name__ == "__main__":
@@ -1,53 +1,137 @@
 # report_generator.py (create this in the main project directory)
 
 import csv
+import io
 import os
 from datetime import datetime
 import logging
 
+# zstd shrinks archived CSV reports ~3-5x at negligible CPU cost; fall
+# back silently to plain CSV when it isn't installed
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
 logger = logging.getLogger(__name__)
 
 class ReportGenerator:
+    # Rows fetched from the database per batch while streaming a report
+    CHUNK_SIZE = 10000
+
     def __init__(self, db_manager, reports_dir):
         self.db_manager = db_manager
         self.reports_dir = reports_dir
         if not os.path.exists(self.reports_dir):
             os.makedirs(self.reports_dir)
 
-    def generate_daily_report(self, date=None):
+    def _iter_record_batches(self, **query):
+        """Yield attendance records in batches instead of one big list.
+
+        Prefers the db layer's chunked get_attendance_records_iter (a
+        fetchmany-style generator) so peak memory stays at CHUNK_SIZE
+        rows; falls back to the all-at-once get_attendance_records.
+        """
+        fetch_iter = getattr(self.db_manager, 'get_attendance_records_iter', None)
+        if fetch_iter is not None:
+            yield from fetch_iter(chunk_size=self.CHUNK_SIZE, **query)
+        else:
+            records = self.db_manager.get_attendance_records(**query)
+            if records:
+                yield records
+
+    def _emit_csv(self, csvfile, batches, empty_row):
+        writer = csv.writer(csvfile)
+        writer.writerow(['Student ID', 'Name', 'Date', 'Time'])
+        wrote_rows = False
+        for batch in batches:
+            writer.writerows(batch)
+            wrote_rows = True
+        if not wrote_rows:
+            writer.writerow(empty_row)
+
+    def _write_report(self, filename, batches, empty_row, compress):
+        """Write a report CSV, optionally zstd-compressed to <name>.zst.
+
+        Returns the path actually written.
+        """
+        if compress and zstd is None:
+            logger.warning("zstandard not installed; writing uncompressed CSV")
+            compress = False
+
+        if compress:
+            filename += '.zst'
+            with open(filename, 'wb') as raw:
+                # level 3 is the size/speed sweet spot for text like CSV
+                cctx = zstd.ZstdCompressor(level=3)
+                with cctx.stream_writer(raw, closefd=False) as comp:
+                    textfile = io.TextIOWrapper(comp, encoding='utf-8', newline='')
+                    self._emit_csv(textfile, batches, empty_row)
+                    # flush+detach so closing the wrapper can't close the
+                    # compressor before its frame is finalized below
+                    textfile.flush()
+                    textfile.detach()
+        else:
+            # 1 MiB buffer amortizes write syscalls across many rows
+            with open(filename, 'w', newline='', buffering=1048576) as csvfile:
+                self._emit_csv(csvfile, batches, empty_row)
+
+        return filename
+
+    def _cached_report(self, filename, compress):
+        """Return the existing report path if it's still fresh, else None.
+
+        A report file newer than the database's last write cannot have
+        stale contents, so repeat requests for an unchanged day or
+        student are served from disk. The database runs in WAL mode, so
+        commits land in the -wal sidecar and only reach the main file at
+        checkpoint time -- last write is the newer of the two mtimes.
+        """
+        db_path = getattr(self.db_manager, 'db_path', 'database/attendance_system.db')
+        if compress and zstd is not None:
+            filename += '.zst'
+        try:
+            db_mtime = os.path.getmtime(db_path)
+            try:
+                db_mtime = max(db_mtime, os.path.getmtime(db_path + '-wal'))
+            except OSError:
+                pass
+            if os.path.getmtime(filename) > db_mtime:
+                return filename
+        except OSError:
+            pass
+        return None
+
+    def generate_daily_report(self, date=None, compress=False):
         if date is None:
             date = datetime.now().date()
         date_str = date.strftime('%Y-%m-%d')
         filename = os.path.join(self.reports_dir, f"daily_attendance_report_{date_str}.csv")
 
-        records = self.db_manager.get_attendance_records(start_date=date_str, end_date=date_str)
+        cached = self._cached_report(filename, compress)
+        if cached is not None:
+            logger.info(f"Daily report cache hit: {cached}")
+            return cached
 
-        with open(filename, 'w', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(['Student ID', 'Name', 'Date', 'Time'])
-            if records:
-                for record in records:
-                    writer.writerow(record)
-            else:
-                writer.writerow(['No attendance recorded for this date.'])
+        batches = self._iter_record_batches(start_date=date_str, end_date=date_str)
+        filename = self._write_report(
+            filename, batches, ['No attendance recorded for this date.'], compress)
 
         logger.info(f"Daily report generated: {filename}")
         return filename
 
     # Add methods for weekly, monthly, student-wise reports
-    def generate_student_report(self, student_id):
+    def generate_student_report(self, student_id, compress=False):
         filename = os.path.join(self.reports_dir, f"student_attendance_report_{student_id}.csv")
 
-        records = self.db_manager.get_attendance_records(student_id=student_id)
+        cached = self._cached_report(filename, compress)
+        if cached is not None:
+            logger.info(f"Student report cache hit: {cached}")
+            return cached
 
-        with open(filename, 'w', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(['Student ID', 'Name', 'Date', 'Time'])
-            if records:
-                for record in records:
-                    writer.writerow(record)
-            else:
-                writer.writerow([f'No attendance records found for {student_id}.'])
+        batches = self._iter_record_batches(student_id=student_id)
+        filename = self._write_report(
+            filename, batches, [f'No attendance records found for {student_id}.'], compress)
 
         logger.info(f"Student report generated: {filename}")
         return filename